@@ -1,68 +1,347 @@
-from flask import Flask, request, jsonify
+import io
+import itertools
+from contextlib import nullcontext
+
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
 
+import cache
+from coloring import CompactGraph
+from enrollment import CHUNK_SIZE, PARSERS, Enrollments, InvalidUpload, co_enrollment, iter_lines
+from improve import improve
+from jobs import JobQueue
+import metrics
+from parallel import color_components
+from sessions import SessionStore
+
 app = Flask(__name__)
 CORS(app)
+schedule_cache = cache.from_env()
+sessions = SessionStore()
+registry = metrics.Registry()
+profiler = metrics.profiler_from_env()
+
+INSTRUMENTED = {"upload", "graph", "schedule"}
+
+@app.before_request
+def start_timings():
+    if request.endpoint in INSTRUMENTED:
+        g.timings = metrics.RequestTimings(request.endpoint)
+        g.profile = profiler.start() if profiler else None
+
+@app.after_request
+def finish_timings(response):
+    timings = g.get("timings")
+    if timings is None:
+        return response
+
+    g.status = response.status_code
+    if response.is_streamed:
+        # The body is still to be written, so the request is recorded once
+        # the server closes the response; teardown leaves it alone.
+        g.streamed = True
+        profile = g.profile
+        response.call_on_close(lambda: record_timings(timings, profile, response.status_code))
+        return response
+
+    timings.finish()
+    response.headers["Server-Timing"] = timings.server_timing()
+    if request.args.get("timings") and response.is_json:
+        body = response.get_json()
+        body["timings"] = timings.to_dict()
+        response.set_data(app.json.dumps(body))
+    return response
+
+@app.teardown_request
+def stop_timings(exc):
+    # Also runs when a view raised and after_request was skipped, so the
+    # profiler is always stopped and its busy lock released.
+    timings = g.get("timings")
+    if timings is None or g.get("streamed"):
+        return
+    record_timings(timings, g.profile, g.get("status", 500))
+
+def record_timings(timings, profile, status):
+    if timings.elapsed is None:
+        timings.finish()
+    if profile is not None:
+        profiler.stop(profile, timings)
+    registry.record(timings, status)
+
+def phase(name):
+    # Also called from job threads, outside any request.
+    timings = g.get("timings") if has_request_context() else None
+    return timings.phase(name) if timings else nullcontext()
+
+def record_size(name, value):
+    timings = g.get("timings") if has_request_context() else None
+    if timings:
+        timings.sizes[name] = value
+
+@app.errorhandler(InvalidUpload)
+def invalid_upload(e):
+    return jsonify({"status": "error", "message": str(e)}), 400
+
+def read_rows():
+    parser = PARSERS.get(request.args.get("format", "csv"))
+    if parser is None:
+        return None, (jsonify({"status": "error", "message": "Unknown format"}), 400)
 
-def build_graph(exams, conflicts):
-    graph = {e: set() for e in exams}
-    for a, b in conflicts:
-        if a != b:
-            graph[a].add(b)
-            graph[b].add(a)
-    return graph
-
-def dsatur(graph):
-    color = {}
-    saturation = {v: set() for v in graph}
-    degree = {v: len(graph[v]) for v in graph}
-    uncolored = set(graph.keys())
-
-    while uncolored:
-        chosen = max(uncolored, key=lambda v: (len(saturation[v]), degree[v]))
-        used_colors = {color[n] for n in graph[chosen] if n in color}
-        c = 1
-        while c in used_colors:
-            c += 1
-        color[chosen] = c
-        uncolored.remove(chosen)
-        for neighbor in graph[chosen]:
-            if neighbor in uncolored:
-                saturation[neighbor].add(c)
-    return color
+    # Raw bodies sent with chunked transfer encoding (curl -T -) have no
+    # Content-Length.
+    chunked = "chunked" in request.headers.get("Transfer-Encoding", "").lower()
+    with phase("decode"):
+        file = request.files.get("file")
+    if file:
+        # The request closes its uploaded files as soon as the view returns,
+        # before a streamed response has read them, so the file's stream is
+        # handed over and closed by parse_stream instead.
+        stream, file.stream = file.stream, io.BytesIO()
+    elif request.mimetype != "multipart/form-data" and (request.content_length or chunked):
+        stream = request.stream
+    else:
+        return None, (jsonify({"status": "error", "message": "No file"}), 400)
+
+    return parse_stream(parser, stream), None
+
+def parse_stream(parser, stream):
+    try:
+        yield from parser(iter_lines(stream))
+    finally:
+        stream.close()
 
 @app.route("/upload", methods=["POST"])
 def upload():
-    file = request.files.get("file")
-    if not file:
-        return jsonify({"status": "error", "message": "No file"}), 400
+    rows, error = read_rows()
+    if error:
+        return error
+
+    # Parsing the first row here turns a body that is corrupt from the start
+    # into a 400; the rest is parsed while the response is written.
+    rows = iter(rows)
+    with phase("parse"):
+        first = next(rows, None)
+    rows = rows if first is None else itertools.chain((first,), rows)
+    return Response(stream_with_context(stream_rows(rows)), mimetype="application/json")
+
+def stream_rows(rows):
+    # Writes {"data": [...], "status": ...} a batch of rows at a time, so
+    # memory stays flat however large the upload is. A body that turns out
+    # to be corrupt part-way through ends with status "error".
+    dumps = app.json.dumps
+    count = 0
+    batch = []
+    size = 0
+    yield '{"data": ['
+    try:
+        with phase("stream"):
+            for student, course in rows:
+                row = dumps({"student": student, "course": course})
+                batch.append(row)
+                size += len(row)
+                if size >= CHUNK_SIZE:
+                    yield ("," if count else "") + ",".join(batch)
+                    count += len(batch)
+                    batch = []
+                    size = 0
+    except InvalidUpload as e:
+        status = {"status": "error", "message": str(e)}
+    else:
+        status = {"status": "success"}
+    if batch:
+        yield ("," if count else "") + ",".join(batch)
+        count += len(batch)
+    record_size("rows", count)
+    yield "], " + dumps(status)[1:]
+
+@app.route("/graph", methods=["POST"])
+def graph():
+    rows, error = read_rows()
+    if error:
+        return error
+
+    with phase("parse"):
+        enrollments = Enrollments.from_rows(rows)
+    with phase("graph"):
+        sizes, source, target, weight = co_enrollment(enrollments)
+    record_size("rows", len(enrollments))
+    record_size("vertices", len(sizes))
+    record_size("edges", len(source))
 
-    text = file.read().decode("utf-8").strip()
-    lines = text.split("\n")
-    enrollments = []
+    with phase("encode"):
+        return jsonify({
+            "status": "success",
+            "courses": enrollments.courses.names,
+            "sizes": sizes,
+            "edges": {"source": source, "target": target, "weight": weight}
+        })
 
-    for idx, line in enumerate(lines):
-        if idx == 0 and "student" in line.lower():
-            continue
-        parts = [p.strip() for p in line.split(",") if p.strip()]
-        if len(parts) < 2:
-            continue
-        enrollments.append({"student": parts[0], "course": parts[1]})
+def by_name(slots):
+    # JSON object keys are strings anyway; stringifying first lets a mix of
+    # numeric and string names be sorted when encoding.
+    return {str(name): c for name, c in slots.items()}
 
-    return jsonify({"status": "success", "data": enrollments})
+def parse_options(data):
+    # Raises ValueError for improve options that aren't numbers.
+    options = data.get("improve")
+    if not options:
+        return None
+    try:
+        return {
+            "time_budget_ms": float(options.get("time_budget_ms", 1000)),
+            "workers": int(options.get("workers", 1)),
+        }
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("Invalid improve options")
+
+def solve(exams, conflicts, options=None, on_step=None):
+    # The normalize -> cache -> color -> improve pipeline behind both
+    # /schedule and /jobs, so the two agree on every input. exams and
+    # conflicts must already be normalized. Returns the cache key, the JSON
+    # body and whether it came from the cache.
+    with phase("cache"):
+        key = cache.schedule_key(exams, conflicts, options)
+        body = schedule_cache.get(key)
+    if body is not None:
+        return key, body, True
+
+    with phase("graph"):
+        graph = CompactGraph.from_edges(exams, conflicts)
+    with phase("color"):
+        colors, components = color_components(graph, on_step=on_step)
+    response = {"status": "success", "components": components}
+
+    if options:
+        with phase("improve"):
+            colors, response["improvement"] = improve(graph, colors, **options)
+    record_size("vertices", len(graph))
+    record_size("edges", len(graph.neighbors) // 2)
+    record_size("colors", max(colors, default=0))
+
+    with phase("encode"):
+        response["scheduled"] = by_name(graph.label(colors))
+        body = app.json.dumps(response).encode()
+        schedule_cache.put(key, app.json.dumps(cache.without_timings(response)).encode())
+    return key, body, False
+
+jobs = JobQueue(solve)
+
+def read_schedule_request():
+    # Returns (exams, conflicts, options, error) for /schedule and /jobs.
+    data = request.get_json()
+    try:
+        exams, conflicts = cache.normalize(data.get("exams", []), data.get("conflicts", []))
+        options = parse_options(data)
+    except (TypeError, ValueError) as e:
+        return None, None, None, (jsonify({"status": "error", "message": str(e)}), 400)
+    return exams, conflicts, options, None
 
 @app.route("/schedule", methods=["POST"])
 def schedule():
+    with phase("decode"):
+        exams, conflicts, options, error = read_schedule_request()
+    if error:
+        return error
+
+    key, body, cached = solve(exams, conflicts, options)
+    headers = {"X-Cache": "HIT" if cached else "MISS", "X-Cache-Key": key}
+    return Response(body, mimetype="application/json", headers=headers)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/cache", methods=["GET"])
+def cache_stats():
+    return jsonify({"status": "success", "cache": schedule_cache.stats()})
+
+@app.route("/cache/invalidate", methods=["POST"])
+def cache_invalidate():
+    data = request.get_json(silent=True) or {}
+    removed = schedule_cache.invalidate(data.get("key"))
+    return jsonify({"status": "success", "removed": removed})
+
+@app.route("/sessions", methods=["POST"])
+def create_session():
+    data = request.get_json()
+    try:
+        enrollments = [(e["student"], e["course"]) for e in data.get("enrollments", [])]
+        session_id, session = sessions.create(data.get("exams", []), data.get("conflicts", []), enrollments)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Invalid session: {e}"}), 400
+
+    return jsonify({
+        "status": "success",
+        "session": session_id,
+        "slots": session.slots(),
+        "scheduled": by_name(session.color)
+    })
+
+@app.route("/sessions/<session_id>", methods=["GET"])
+def get_session(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"status": "error", "message": "Unknown session"}), 404
+
+    return jsonify({"status": "success", "slots": session.slots(), "scheduled": by_name(session.color)})
+
+@app.route("/sessions/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    if not sessions.delete(session_id):
+        return jsonify({"status": "error", "message": "Unknown session"}), 404
+
+    return jsonify({"status": "success"})
+
+@app.route("/sessions/<session_id>/deltas", methods=["POST"])
+def apply_deltas(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"status": "error", "message": "Unknown session"}), 404
+
     data = request.get_json()
-    exams = data.get("exams", [])
-    conflicts = data.get("conflicts", [])
-    graph = build_graph(exams, conflicts)
-    coloring = dsatur(graph)
+    try:
+        changed, removed = session.apply(data.get("deltas", []))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Invalid delta: {e}"}), 400
 
     return jsonify({
         "status": "success",
-        "scheduled": coloring
+        "slots": session.slots(),
+        "changed": by_name(changed),
+        "removed": removed
     })
 
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    exams, conflicts, options, error = read_schedule_request()
+    if error:
+        return error
+    job = jobs.submit(exams, conflicts, options)
+
+    return jsonify({"status": "success", "job": job.id}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+
+    return jsonify({"status": "success", **job.summary()})
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+
+    start = request.headers.get("Last-Event-ID") or request.args.get("from") or 0
+    try:
+        start = max(0, int(start))
+    except ValueError:
+        start = 0
+
+    return Response(job.events(start), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 if __name__ == "__main__":
     app.run(debug=True)
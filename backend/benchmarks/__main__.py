@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+
+from benchmarks.generate import generate, write_csv
+from benchmarks.harness import MIN_PEAK_KB, MIN_SECONDS, REFERENCE_LIMIT, REPEAT, SIZES, compare, load, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write a synthetic enrollment CSV (.csv or .csv.gz)")
+    gen.add_argument("output")
+    gen.add_argument("--students", type=int, default=1000)
+    gen.add_argument("--courses", type=int)
+    gen.add_argument("--seed", type=int, default=0)
+
+    bench = commands.add_parser("run", help="time upload, graph and scheduling at each size")
+    bench.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--reference-limit", type=int, default=REFERENCE_LIMIT,
+                       help="skip the reference dsatur above this many exams")
+    bench.add_argument("--repeat", type=int, default=REPEAT, help="keep the best of this many runs per phase")
+    bench.add_argument("--output", default="-")
+
+    cmp = commands.add_parser("compare", help="fail if current regresses against baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--max-slowdown", type=float, default=0.2)
+    cmp.add_argument("--max-extra-slots", type=int, default=0)
+    cmp.add_argument("--max-memory-growth", type=float, default=0.2)
+    cmp.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                     help="ignore throughput of phases faster than this in the baseline")
+    cmp.add_argument("--min-peak-kb", type=int, default=MIN_PEAK_KB,
+                     help="ignore memory of phases that peaked below this in the baseline")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        write_csv(generate(args.students, args.courses, seed=args.seed), args.output)
+        return 0
+
+    if args.command == "run":
+        log = lambda r: print(f"{r['size']:>8} {r['phase']:<18} {r['seconds']:>10.4f}s {r['peak_kb']:>10} KiB",
+                              file=sys.stderr)
+        report = json.dumps(run(args.sizes, args.seed, args.reference_limit, args.repeat, log), indent=2)
+        if args.output == "-":
+            print(report)
+        else:
+            with open(args.output, "w") as f:
+                f.write(report + "\n")
+        return 0
+
+    regressions = compare(load(args.baseline), load(args.current), args.max_slowdown, args.max_extra_slots,
+                          args.min_seconds, args.max_memory_growth, args.min_peak_kb)
+    for r in regressions:
+        print(f"{r['size']:>8} {r['phase']:<18} {r['metric']}: {r['baseline']} -> {r['current']}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
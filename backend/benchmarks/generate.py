@@ -0,0 +1,54 @@
+import bisect
+import gzip
+import itertools
+import random
+
+MIN_COURSES = 4
+MAX_COURSES = 7
+HOME_SHARE = 0.7
+
+
+def default_courses(students):
+    return max(50, students // 25)
+
+
+def generate(students, courses=None, departments=None, seed=0, zipf=1.1):
+    # Students take 4-7 distinct courses. Course popularity follows a Zipf
+    # law within each department and most of a student's courses come from
+    # their home department, which gives the skewed, clustered conflict
+    # graphs a registrar export has.
+    rng = random.Random(seed)
+    courses = courses or default_courses(students)
+    departments = departments or max(1, courses // 40)
+    by_department = [list(range(d, courses, departments)) for d in range(departments)]
+    weights = [list(itertools.accumulate(1 / (rank + 1) ** zipf for rank in range(len(members))))
+               for members in by_department]
+    everywhere = list(itertools.accumulate(1 / (rank + 1) ** zipf for rank in range(courses)))
+
+    for s in range(students):
+        home = rng.randrange(departments)
+        members, cumulative = by_department[home], weights[home]
+        wanted = min(rng.randint(MIN_COURSES, MAX_COURSES), courses)
+        taken = set()
+        while len(taken) < wanted:
+            if rng.random() < HOME_SHARE and len(taken) < len(members):
+                course = members[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+            else:
+                course = bisect.bisect(everywhere, rng.random() * everywhere[-1])
+            taken.add(course)
+        for course in sorted(taken):
+            yield f"S{s:07d}", f"C{course:05d}"
+
+
+def to_csv(rows):
+    lines = ["student_id,course"]
+    lines.extend(f"{student},{course}" for student, course in rows)
+    return ("\n".join(lines) + "\n").encode()
+
+
+def write_csv(rows, path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        f.write("student_id,course\n")
+        for student, course in rows:
+            f.write(f"{student},{course}\n")
@@ -0,0 +1,161 @@
+import io
+import json
+import platform
+import time
+import tracemalloc
+
+import app as server
+from benchmarks.generate import generate, to_csv
+from coloring import CompactGraph, build_graph, dsatur, dsatur_heap
+from enrollment import Enrollments, co_enrollment, iter_lines, parse_rows
+
+SIZES = (1000, 10000, 100000, 1000000)
+REFERENCE_LIMIT = 3000
+REPEAT = 3
+MIN_SECONDS = 0.05
+MIN_PEAK_KB = 1024
+
+
+def peak_kb(fn):
+    # Peak memory allocated by fn above what was live when it started, as
+    # seen by tracemalloc (numpy and scipy buffers included). Measured in a
+    # separate run because tracing slows the code down several times.
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        value = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, (peak - base) // 1024
+
+
+def timed(results, size, phase, fn, units=None, repeat=1, **extra):
+    # Best of repeat runs, which filters out scheduler and GC noise.
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        value = None
+    value, peak = peak_kb(fn)
+    record = {"size": size, "phase": phase, "seconds": round(seconds, 6), **extra}
+    if units is not None:
+        count = units(value) if callable(units) else units
+        record["units"] = count
+        record["throughput"] = round(count / seconds, 3) if seconds else None
+    record["peak_kb"] = peak
+    results.append(record)
+    return value, record
+
+
+def run_size(size, seed=0, reference_limit=REFERENCE_LIMIT, repeat=REPEAT):
+    results = []
+    client = server.app.test_client()
+
+    rows = list(generate(size, seed=seed))
+    body = to_csv(rows)
+    del rows
+    n_rows = body.count(b"\n") - 1
+
+    timed(results, size, "parse", lambda: Enrollments.from_rows(parse_rows(iter_lines(io.BytesIO(body)))),
+          units=n_rows, rows=n_rows, repeat=repeat)
+    timed(results, size, "upload", lambda: client.post("/upload", data=body, content_type="text/csv"),
+          units=n_rows, rows=n_rows, repeat=repeat)
+    response, _ = timed(results, size, "graph_endpoint",
+                        lambda: client.post("/graph", data=body, content_type="text/csv"),
+                        units=n_rows, rows=n_rows, repeat=repeat)
+    graph_data = response.get_json()
+    exams = graph_data["courses"]
+    edges = graph_data["edges"]
+    conflicts = [[exams[u], exams[v]] for u, v in zip(edges["source"], edges["target"])]
+    del body, graph_data, edges
+
+    enrollments = Enrollments.from_rows(generate(size, seed=seed))
+    timed(results, size, "co_enrollment", lambda: co_enrollment(enrollments),
+          units=len(enrollments), repeat=repeat)
+    del enrollments
+
+    graph_size = {"vertices": len(exams), "edges": len(conflicts)}
+    if len(exams) <= reference_limit:
+        graph, _ = timed(results, size, "build_graph", lambda: build_graph(exams, conflicts),
+                         units=len(conflicts), repeat=repeat, **graph_size)
+        coloring, record = timed(results, size, "dsatur", lambda: dsatur(graph),
+                                 units=len(exams), repeat=repeat, **graph_size)
+        record["slots"] = max(coloring.values(), default=0)
+        del graph, coloring
+
+    compact, _ = timed(results, size, "compact_graph", lambda: CompactGraph.from_edges(exams, conflicts),
+                       units=len(conflicts), repeat=repeat, **graph_size)
+    colors, record = timed(results, size, "dsatur_heap", lambda: dsatur_heap(compact),
+                           units=len(exams), repeat=repeat, **graph_size)
+    record["slots"] = max(colors, default=0)
+    del compact, colors
+
+    def schedule():
+        server.schedule_cache.invalidate()
+        return client.post("/schedule", json={"exams": exams, "conflicts": conflicts})
+
+    response, record = timed(results, size, "schedule_endpoint", schedule,
+                             units=len(exams), repeat=repeat, **graph_size)
+    record["slots"] = max(response.get_json()["scheduled"].values(), default=0)
+    return results
+
+
+def run(sizes=SIZES, seed=0, reference_limit=REFERENCE_LIMIT, repeat=REPEAT, log=None):
+    results = []
+    for size in sizes:
+        for record in run_size(size, seed, reference_limit, repeat):
+            results.append(record)
+            if log is not None:
+                log(record)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, max_slowdown=0.2, max_extra_slots=0, min_seconds=MIN_SECONDS,
+            max_memory_growth=0.2, min_peak_kb=MIN_PEAK_KB):
+    # Returns the regressions of current against baseline: a phase whose
+    # throughput dropped by more than max_slowdown, whose peak memory grew
+    # by more than max_memory_growth, or a coloring that uses more than
+    # max_extra_slots additional slots. Phases that took under min_seconds
+    # or peaked under min_peak_kb in the baseline are too noisy to check.
+    before = {(r["size"], r["phase"]): r for r in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        old = before.get((record["size"], record["phase"]))
+        if old is None:
+            continue
+        if old.get("throughput") and record.get("throughput") is not None and old["seconds"] >= min_seconds:
+            ratio = record["throughput"] / old["throughput"]
+            if ratio < 1 - max_slowdown:
+                regressions.append({
+                    "size": record["size"], "phase": record["phase"], "metric": "throughput",
+                    "baseline": old["throughput"], "current": record["throughput"],
+                })
+        if old.get("peak_kb", 0) >= min_peak_kb and "peak_kb" in record:
+            if record["peak_kb"] > old["peak_kb"] * (1 + max_memory_growth):
+                regressions.append({
+                    "size": record["size"], "phase": record["phase"], "metric": "peak_kb",
+                    "baseline": old["peak_kb"], "current": record["peak_kb"],
+                })
+        if "slots" in old and "slots" in record and record["slots"] > old["slots"] + max_extra_slots:
+            regressions.append({
+                "size": record["size"], "phase": record["phase"], "metric": "slots",
+                "baseline": old["slots"], "current": record["slots"],
+            })
+    return regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
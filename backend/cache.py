@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from coloring import check_exam_name, exam_key
+
+
+def normalize(exams, conflicts):
+    # Raises ValueError for names that are not strings or numbers and for
+    # conflicts that are not pairs.
+    exams = sorted({check_exam_name(e) for e in exams}, key=exam_key)
+    pairs = set()
+    for conflict in conflicts:
+        if not isinstance(conflict, (list, tuple)) or len(conflict) != 2:
+            raise ValueError(f"Conflicts must be pairs of exams, not {conflict!r}")
+        a, b = map(check_exam_name, conflict)
+        if a != b:
+            pairs.add((a, b) if exam_key(a) < exam_key(b) else (b, a))
+    return exams, sorted(pairs, key=lambda pair: (exam_key(pair[0]), exam_key(pair[1])))
+
+
+def without_timings(response):
+    # Per-run wall times would be stale when replayed from the cache.
+    cached = dict(response)
+    cached["components"] = dict(
+        response["components"],
+        tasks=[{k: v for k, v in task.items() if k != "ms"} for task in response["components"]["tasks"]],
+    )
+    if "improvement" in response:
+        cached["improvement"] = {k: v for k, v in response["improvement"].items() if k != "ms"}
+    return cached
+
+
+def schedule_key(exams, conflicts, options=None):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([exams, conflicts, options], sort_keys=True, separators=(",", ":")).encode())
+    return digest.hexdigest()
+
+
+class ScheduleCache:
+    # Two tiers: an in-process LRU bounded by entry count and total bytes,
+    # and an optional sqlite file shared across worker restarts. Values are
+    # the encoded response bodies, so a hit is returned without re-encoding.
+
+    def __init__(self, max_entries=256, max_bytes=64 << 20, path=None, max_disk_entries=4096):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.touched = {}
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS schedules "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, used REAL NOT NULL)"
+            )
+            self.db.commit()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self.db is not None:
+                row = self.db.execute("SELECT value FROM schedules WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    # Recency is written back with the next put rather than
+                    # committing (and syncing) on the read path.
+                    self.touched[key] = time.time()
+                    self.disk_hits += 1
+                    self._remember(key, bytes(row[0]))
+                    return bytes(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self._remember(key, value)
+            if self.db is not None:
+                self.touched.pop(key, None)
+                self._flush_touched()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO schedules (key, value, used) VALUES (?, ?, ?)",
+                    (key, value, time.time()),
+                )
+                self.db.execute(
+                    "DELETE FROM schedules WHERE key NOT IN "
+                    "(SELECT key FROM schedules ORDER BY used DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+                self.db.commit()
+
+    def invalidate(self, key=None):
+        # Returns the number of distinct keys removed across both tiers.
+        with self.lock:
+            if key is None:
+                keys = set(self.entries)
+                self.entries.clear()
+                self.size = 0
+                self.touched.clear()
+                if self.db is not None:
+                    keys.update(k for (k,) in self.db.execute("SELECT key FROM schedules"))
+                    self.db.execute("DELETE FROM schedules")
+                    self.db.commit()
+                return len(keys)
+
+            value = self.entries.pop(key, None)
+            found = value is not None
+            if found:
+                self.size -= len(value)
+            self.touched.pop(key, None)
+            if self.db is not None:
+                cursor = self.db.execute("DELETE FROM schedules WHERE key = ?", (key,))
+                self.db.commit()
+                found = found or cursor.rowcount > 0
+            return int(found)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remember(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = value
+        self.size += len(value)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def _flush_touched(self):
+        if self.touched:
+            self.db.executemany(
+                "UPDATE schedules SET used = ? WHERE key = ?",
+                [(used, key) for key, used in self.touched.items()],
+            )
+            self.touched.clear()
+
+
+def from_env():
+    return ScheduleCache(
+        max_entries=int(os.environ.get("SCHEDULE_CACHE_ENTRIES", 256)),
+        max_bytes=int(os.environ.get("SCHEDULE_CACHE_BYTES", 64 << 20)),
+        path=os.environ.get("SCHEDULE_CACHE_PATH") or None,
+        max_disk_entries=int(os.environ.get("SCHEDULE_CACHE_DISK_ENTRIES", 4096)),
+    )
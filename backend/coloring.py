@@ -0,0 +1,191 @@
+import heapq
+from array import array
+
+
+EXAM_NAME_TYPES = (str, int, float)
+
+
+def check_exam_name(name, what="Exam names"):
+    if isinstance(name, bool) or not isinstance(name, EXAM_NAME_TYPES):
+        raise ValueError(f"{what} must be strings or numbers, not {name!r}")
+    return name
+
+
+def exam_key(name):
+    # Orders a mix of numeric and string names without comparing across
+    # types: numbers first, then strings.
+    return isinstance(name, str), name
+
+
+def build_graph(exams, conflicts):
+    graph = {e: set() for e in exams}
+    for a, b in conflicts:
+        if a != b:
+            graph[a].add(b)
+            graph[b].add(a)
+    return graph
+
+
+# Reference implementation, kept for checking dsatur_heap. Ties on
+# (saturation, degree) go to the exam that appears first in the graph.
+def dsatur(graph):
+    order = {v: i for i, v in enumerate(graph)}
+    color = {}
+    saturation = {v: set() for v in graph}
+    degree = {v: len(graph[v]) for v in graph}
+    uncolored = set(graph.keys())
+
+    while uncolored:
+        chosen = max(uncolored, key=lambda v: (len(saturation[v]), degree[v], -order[v]))
+        used_colors = {color[n] for n in graph[chosen] if n in color}
+        c = 1
+        while c in used_colors:
+            c += 1
+        color[chosen] = c
+        uncolored.remove(chosen)
+        for neighbor in graph[chosen]:
+            if neighbor in uncolored:
+                saturation[neighbor].add(c)
+    return color
+
+
+class CompactGraph:
+    __slots__ = ("names", "index", "offsets", "neighbors")
+
+    def __init__(self, names, offsets, neighbors):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+
+    @classmethod
+    def from_edges(cls, exams, conflicts):
+        index = {}
+        names = []
+        for e in exams:
+            if e not in index:
+                index[e] = len(names)
+                names.append(e)
+
+        n = len(names)
+        seen = set()
+        pairs = array("q")
+        degree = array("l", [0]) * (n + 1)
+        for a, b in conflicts:
+            u, v = index[a], index[b]
+            if u == v:
+                continue
+            if u > v:
+                u, v = v, u
+            key = u * n + v
+            if key in seen:
+                continue
+            seen.add(key)
+            pairs.append(key)
+            degree[u] += 1
+            degree[v] += 1
+        del seen
+
+        offsets = array("l", [0]) * (n + 1)
+        for i in range(n):
+            offsets[i + 1] = offsets[i] + degree[i]
+        fill = array("l", offsets[:n])
+        neighbors = array("l", [0]) * offsets[n]
+        for key in pairs:
+            u, v = divmod(key, n)
+            neighbors[fill[u]] = v
+            fill[u] += 1
+            neighbors[fill[v]] = u
+            fill[v] += 1
+        return cls(names, offsets, neighbors)
+
+    @classmethod
+    def from_graph(cls, graph):
+        return cls.from_edges(graph, ((a, b) for a in graph for b in graph[a] if a != b))
+
+    def __len__(self):
+        return len(self.names)
+
+    def degree(self, v):
+        return self.offsets[v + 1] - self.offsets[v]
+
+    def adjacent(self, v):
+        return self.neighbors[self.offsets[v]:self.offsets[v + 1]]
+
+    def label(self, colors):
+        return {name: colors[v] for v, name in enumerate(self.names)}
+
+
+def lowest_free_color(mask):
+    return (~mask & (mask + 1)).bit_length()
+
+
+def dsatur_heap(graph, on_step=None):
+    # Saturation is kept as a bitmask of neighbour colors per vertex, so the
+    # smallest free color is the lowest clear bit. The heap uses lazy
+    # deletion: an entry is stale once the vertex is colored or its
+    # saturation has grown since the entry was pushed.
+    n = len(graph)
+    offsets, neighbors = graph.offsets, graph.neighbors
+    colors = array("l", [0]) * n
+    sat_mask = [0] * n
+    sat_count = array("l", [0]) * n
+    heap = [(0, offsets[v] - offsets[v + 1], v) for v in range(n)]
+    heapq.heapify(heap)
+
+    while heap:
+        neg_sat, neg_deg, chosen = heapq.heappop(heap)
+        if colors[chosen] or -neg_sat != sat_count[chosen]:
+            continue
+        c = lowest_free_color(sat_mask[chosen])
+        colors[chosen] = c
+        if on_step is not None:
+            on_step(chosen, c)
+        bit = 1 << (c - 1)
+        for i in range(offsets[chosen], offsets[chosen + 1]):
+            u = neighbors[i]
+            if colors[u] or sat_mask[u] & bit:
+                continue
+            sat_mask[u] |= bit
+            sat_count[u] += 1
+            heapq.heappush(heap, (-sat_count[u], offsets[u] - offsets[u + 1], u))
+    return colors
+
+
+def connected_components(graph):
+    offsets, neighbors = graph.offsets, graph.neighbors
+    component = array("l", [-1]) * len(graph)
+    result = []
+    for start in range(len(graph)):
+        if component[start] >= 0:
+            continue
+        k = len(result)
+        component[start] = k
+        stack = [start]
+        members = []
+        while stack:
+            v = stack.pop()
+            members.append(v)
+            for i in range(offsets[v], offsets[v + 1]):
+                u = neighbors[i]
+                if component[u] < 0:
+                    component[u] = k
+                    stack.append(u)
+        members.sort()
+        result.append(members)
+    return result
+
+
+def subgraph(graph, vertices):
+    # vertices must be closed under adjacency (a union of components) and
+    # sorted, so dsatur_heap breaks ties the same way as on the full graph.
+    # The subgraph's names are the parent's vertex ids.
+    offsets, neighbors = graph.offsets, graph.neighbors
+    sub_offsets = array("l", [0])
+    sub_neighbors = array("l")
+    for v in vertices:
+        sub_neighbors += neighbors[offsets[v]:offsets[v + 1]]
+        sub_offsets.append(len(sub_neighbors))
+    sub = CompactGraph(list(vertices), sub_offsets, sub_neighbors)
+    sub.neighbors = array("l", map(sub.index.__getitem__, sub_neighbors))
+    return sub
@@ -0,0 +1,172 @@
+import codecs
+import itertools
+import json
+import zlib
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+
+CHUNK_SIZE = 1 << 16
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def iter_chunks(stream, chunk_size=CHUNK_SIZE):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+def decompressed(chunks):
+    # Gzip bodies may hold several members back to back (cat a.gz b.gz,
+    # pigz, bgzip), so a fresh inflater picks up whatever follows the end
+    # of each member.
+    first = b""
+    for chunk in chunks:
+        first += chunk
+        if len(first) >= len(GZIP_MAGIC):
+            break
+    if not first.startswith(GZIP_MAGIC):
+        yield first
+        yield from chunks
+        return
+    inflater = None
+    for chunk in itertools.chain((first,), chunks):
+        while chunk:
+            if inflater is None:
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            yield inflater.decompress(chunk)
+            if not inflater.eof:
+                break
+            chunk = inflater.unused_data
+            inflater = None
+    if inflater is not None:
+        yield inflater.flush()
+        if not inflater.eof:
+            raise zlib.error("truncated gzip stream")
+
+
+def iter_lines(stream, chunk_size=CHUNK_SIZE):
+    # Only the current chunk and the partial line after it are held in
+    # memory. utf-8-sig drops the BOM that registrar exports start with.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    try:
+        for chunk in decompressed(iter_chunks(stream, chunk_size)):
+            lines = (tail + decoder.decode(chunk)).split("\n")
+            tail = lines.pop()
+            yield from lines
+        tail += decoder.decode(b"", final=True)
+    except zlib.error as e:
+        raise InvalidUpload(f"Corrupt gzip body: {e}") from e
+    except UnicodeDecodeError as e:
+        raise InvalidUpload(f"Body is not UTF-8: {e}") from e
+    if tail:
+        yield tail
+
+
+def parse_rows(lines):
+    for idx, line in enumerate(lines):
+        if idx == 0 and "student" in line.lower():
+            continue
+        parts = [p.strip() for p in line.split(",") if p.strip()]
+        if len(parts) < 2:
+            continue
+        yield parts[0], parts[1]
+
+
+def parse_jsonl(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(row, dict):
+            continue
+        student = row.get("student", row.get("student_id"))
+        course = row.get("course", row.get("course_id"))
+        if student is None or course is None:
+            continue
+        yield str(student).strip(), str(course).strip()
+
+
+PARSERS = {"csv": parse_rows, "jsonl": parse_jsonl}
+
+
+class Interner:
+    __slots__ = ("names", "index")
+
+    def __init__(self):
+        self.names = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __call__(self, name):
+        i = self.index.get(name)
+        if i is None:
+            i = self.index[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+
+class Enrollments:
+    __slots__ = ("students", "courses", "student_ids", "course_ids")
+
+    def __init__(self):
+        self.students = Interner()
+        self.courses = Interner()
+        self.student_ids = array("i")
+        self.course_ids = array("i")
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def add(self, student, course):
+        self.student_ids.append(self.students(student))
+        self.course_ids.append(self.courses(course))
+
+    @classmethod
+    def from_rows(cls, rows):
+        enrollments = cls()
+        for student, course in rows:
+            enrollments.add(student, course)
+        return enrollments
+
+
+def co_enrollment(enrollments):
+    # Course x course co-enrollment counts, i.e. the off-diagonal upper
+    # triangle of A.T @ A for the student x course incidence matrix A.
+    # Returns per-course enrollment sizes and the (source, target, weight)
+    # edge columns with source < target.
+    n_students = len(enrollments.students)
+    n_courses = len(enrollments.courses)
+    rows = np.frombuffer(enrollments.student_ids, dtype=np.int32)
+    cols = np.frombuffer(enrollments.course_ids, dtype=np.int32)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(n_students, n_courses),
+    )
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    counts = (incidence.T @ incidence).tocsr()
+    sizes = counts.diagonal().tolist()
+    upper = sparse.triu(counts, k=1).tocoo()
+    order = np.lexsort((upper.col, upper.row))
+    return (
+        sizes,
+        upper.row[order].tolist(),
+        upper.col[order].tolist(),
+        upper.data[order].tolist(),
+    )
@@ -0,0 +1,148 @@
+import random
+import time
+
+from parallel import WORKERS, pool_map
+
+MAX_BUDGET_MS = 60000
+CHECK_EVERY = 1024
+
+
+def reduce_colors(graph, colors, k, deadline):
+    # Fold every vertex colored above k into the color in 1..k that the
+    # fewest of its neighbours currently use. Returns None if the deadline
+    # passes first.
+    colors = list(colors)
+    for v, c in enumerate(colors):
+        if c <= k:
+            continue
+        if not v % CHECK_EVERY and time.monotonic() >= deadline:
+            return None
+        counts = [0] * (k + 1)
+        for u in graph.adjacent(v):
+            if colors[u] <= k:
+                counts[colors[u]] += 1
+        colors[v] = min(range(1, k + 1), key=counts.__getitem__)
+    return colors
+
+
+def tabucol(graph, colors, k, deadline, rng):
+    # TabuCol (Hertz & de Werra, Galinier & Hao): minimise the number of
+    # conflicting edges for a fixed k. gamma[v * k + c] is the number of
+    # neighbours of v colored c, updated in O(degree) per move, so a move is
+    # scored in O(1) without touching the rest of the graph. Returns the
+    # coloring (or None if the deadline passed) and the number of moves made.
+    n = len(graph)
+    offsets, neighbors = graph.offsets, graph.neighbors
+    col = [c - 1 for c in colors]
+    gamma = [0] * (n * k)
+    for v in range(n):
+        if not v % CHECK_EVERY and time.monotonic() >= deadline:
+            return None, 0
+        base = v * k
+        for i in range(offsets[v], offsets[v + 1]):
+            gamma[base + col[neighbors[i]]] += 1
+    conflicted = {v for v in range(n) if gamma[v * k + col[v]]}
+    total = sum(gamma[v * k + col[v]] for v in conflicted) // 2
+    best_total = total
+    tabu = [0] * (n * k)
+    it = 0
+    moves = 0
+
+    while total:
+        # One iteration scans every conflicted vertex, so on large graphs a
+        # single iteration is already expensive; check the clock each time.
+        if time.monotonic() >= deadline:
+            return None, moves
+        it += 1
+        best_delta = None
+        move = None
+        ties = 0
+        for v in conflicted:
+            base = v * k
+            cv = col[v]
+            current = gamma[base + cv]
+            for c in range(k):
+                if c == cv:
+                    continue
+                delta = gamma[base + c] - current
+                if tabu[base + c] > it and total + delta >= best_total:
+                    continue
+                if best_delta is None or delta < best_delta:
+                    best_delta = delta
+                    move = v, c
+                    ties = 1
+                elif delta == best_delta:
+                    ties += 1
+                    if not rng.randrange(ties):
+                        move = v, c
+        if move is None:
+            continue
+
+        moves += 1
+        v, c = move
+        old = col[v]
+        col[v] = c
+        tabu[v * k + old] = it + int(0.6 * len(conflicted)) + rng.randrange(10)
+        total += best_delta
+        for i in range(offsets[v], offsets[v + 1]):
+            u = neighbors[i]
+            base = u * k
+            gamma[base + old] -= 1
+            gamma[base + c] += 1
+            if col[u] == old and not gamma[base + old]:
+                conflicted.discard(u)
+            elif col[u] == c:
+                conflicted.add(u)
+        if gamma[v * k + c]:
+            conflicted.add(v)
+        else:
+            conflicted.discard(v)
+        if total < best_total:
+            best_total = total
+
+    return [c + 1 for c in col], moves
+
+
+def improve_worker(graph, colors, deadline, seed):
+    # deadline is a time.monotonic() value from the parent; the monotonic
+    # clock is system-wide, so worker start-up counts against the budget.
+    rng = random.Random(seed)
+    best = list(colors)
+    k = max(best, default=0)
+    moves = 0
+    while k > 1 and time.monotonic() < deadline:
+        reduced = reduce_colors(graph, best, k - 1, deadline)
+        if reduced is None:
+            break
+        result, n_moves = tabucol(graph, reduced, k - 1, deadline, rng)
+        moves += n_moves
+        if result is None:
+            break
+        best = result
+        k -= 1
+    return best, moves
+
+
+def improve(graph, colors, time_budget_ms=1000, workers=1):
+    # Portfolio: each worker runs its own seeded search for the whole
+    # budget and the coloring with the fewest slots wins.
+    start = time.perf_counter()
+    deadline = time.monotonic() + min(time_budget_ms, MAX_BUDGET_MS) / 1000
+    workers = max(1, min(workers, WORKERS))
+    seeds = range(workers)
+    if workers > 1:
+        results = pool_map(improve_worker, [graph] * workers, [colors] * workers, [deadline] * workers, seeds)
+    else:
+        results = [improve_worker(graph, colors, deadline, 0)]
+
+    best, _ = min(results, key=lambda result: max(result[0], default=0))
+    initial = max(colors, default=0)
+    slots = max(best, default=0)
+    return best, {
+        "initial_slots": initial,
+        "slots": slots,
+        "saved": initial - slots,
+        "workers": workers,
+        "moves": sum(moves for _, moves in results),
+        "ms": round((time.perf_counter() - start) * 1000, 3),
+    }
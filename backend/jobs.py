@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.environ.get("SCHEDULE_JOB_WORKERS", 2))
+MAX_JOBS = int(os.environ.get("SCHEDULE_MAX_JOBS", 64))
+KEEPALIVE_SECONDS = 15
+
+
+class Job:
+    # Steps are stored as two flat int arrays (chosen vertex id, color) in
+    # coloring order, so a job costs O(V) however many clients replay it.
+    # solve(exams, conflicts, options, on_step) is the same pipeline that
+    # serves /schedule and returns its cache key, JSON body and whether it
+    # was cached.
+
+    def __init__(self, exams, conflicts, options, solve):
+        self.id = uuid.uuid4().hex
+        self.exams = exams
+        self.conflicts = conflicts
+        self.options = options
+        self.solve = solve
+        self.status = "queued"
+        self.error = None
+        self.names = None
+        self.cached = None
+        self.chosen = array("l")
+        self.colors = array("l")
+        self.result = None
+        self.seconds = None
+        self.changed = threading.Condition()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            with self.changed:
+                self.names = self.exams
+                self.status = "running"
+                self.changed.notify_all()
+            _, body, self.cached = self.solve(self.exams, self.conflicts, self.options, self._step)
+            result = json.loads(body)
+            if self.cached:
+                # A cached schedule has no coloring trace, so its final slots
+                # are streamed in exam order instead.
+                scheduled = result["scheduled"]
+                for v, name in enumerate(self.names):
+                    self._step(v, scheduled[str(name)])
+            # seconds is set together with the final status, so readers never
+            # see a finished job without its timing.
+            with self.changed:
+                self.result = result
+                self.seconds = time.perf_counter() - start
+                self.status = "done"
+                self.changed.notify_all()
+        except Exception as e:
+            with self.changed:
+                self.error = str(e)
+                self.seconds = time.perf_counter() - start
+                self.status = "error"
+                self.changed.notify_all()
+        finally:
+            self.exams = self.conflicts = self.options = None
+
+    def _step(self, chosen, color):
+        with self.changed:
+            self.chosen.append(chosen)
+            self.colors.append(color)
+            self.changed.notify_all()
+
+    def slots(self):
+        return max(self.result["scheduled"].values(), default=0)
+
+    def finished(self):
+        return self.status in ("done", "error")
+
+    def summary(self):
+        total = len(self.names) if self.names is not None else None
+        summary = {
+            "job": self.id,
+            "state": self.status,
+            "steps": len(self.chosen),
+            "total": total,
+            "progress": len(self.chosen) / total if total else (1.0 if self.finished() else 0.0),
+        }
+        if self.status == "done":
+            # components, improvement and scheduled, as /schedule returns them.
+            summary.update((k, v) for k, v in self.result.items() if k != "status")
+            summary["slots"] = self.slots()
+            summary["cached"] = self.cached
+            summary["ms"] = round(self.seconds * 1000, 3)
+        if self.status == "error":
+            summary["message"] = self.error
+        return summary
+
+    def events(self, start=0):
+        # Server-Sent Events: one "graph" event with the exam names, then a
+        # "step" event per colored vertex, then "done" with the final schedule
+        # (which differs from the steps once improved) or "failed". Event ids
+        # are step indices so a reconnecting client resumes via Last-Event-ID.
+        sent = start
+        announced = False
+        while True:
+            timed_out = False
+            with self.changed:
+                while (len(self.chosen) == sent and not self.finished()
+                       and (announced or self.names is None)):
+                    if not self.changed.wait(KEEPALIVE_SECONDS):
+                        timed_out = True
+                        break
+                names = self.names
+                end = len(self.chosen)
+                chosen = self.chosen[sent:end]
+                colors = self.colors[sent:end]
+                status = self.status
+
+            if names is not None and not announced:
+                announced = True
+                yield sse("graph", {"exams": names, "total": len(names)})
+            if timed_out:
+                yield ": keepalive\n\n"
+            for i, (v, c) in enumerate(zip(chosen, colors), sent):
+                yield sse("step", {"chosen": v, "color": c}, i + 1)
+            sent = end
+
+            if status in ("done", "error") and sent == len(self.chosen):
+                if status == "done":
+                    yield sse("done", {
+                        "slots": self.slots(),
+                        "scheduled": self.result["scheduled"],
+                        "ms": round(self.seconds * 1000, 3),
+                    })
+                else:
+                    yield sse("failed", {"message": self.error})
+                return
+
+
+def sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class JobQueue:
+    def __init__(self, solve, workers=JOB_WORKERS, max_jobs=MAX_JOBS):
+        self.solve = solve
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schedule-job")
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, exams, conflicts, options=None):
+        job = Job(exams, conflicts, options, self.solve)
+        with self.lock:
+            self.jobs[job.id] = job
+            # Drop the oldest finished jobs once over the limit; running
+            # jobs are never evicted.
+            for job_id in list(self.jobs):
+                if len(self.jobs) <= self.max_jobs:
+                    break
+                if self.jobs[job_id].finished():
+                    del self.jobs[job_id]
+        self.executor.submit(job.run)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
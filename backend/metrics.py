@@ -0,0 +1,171 @@
+import bisect
+import cProfile
+import heapq
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{format_labels(labels)} {value}")
+        return lines
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter("scheduler_requests_total", "Instrumented requests by endpoint and status code.")
+        self.latency = Histogram(
+            "scheduler_request_seconds", "Wall time of instrumented requests.", LATENCY_BUCKETS)
+        self.phases = Histogram(
+            "scheduler_phase_seconds", "Wall time spent in each request phase.", LATENCY_BUCKETS)
+        self.sizes = Histogram(
+            "scheduler_request_size", "Rows parsed, vertices, edges and colors used per request.", SIZE_BUCKETS)
+        self.totals = Counter("scheduler_items_total", "Rows parsed, vertices, edges and colors used, summed.")
+
+    def record(self, timings, status):
+        endpoint = (("endpoint", timings.endpoint),)
+        with self.lock:
+            self.requests.inc(endpoint + (("status", status),))
+            self.latency.observe(endpoint, timings.elapsed)
+            for name, seconds in timings.phases:
+                self.phases.observe(endpoint + (("phase", name),), seconds)
+            for name, value in timings.sizes.items():
+                self.sizes.observe(endpoint + (("kind", name),), value)
+                self.totals.inc(endpoint + (("kind", name),), value)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.phases, self.sizes, self.totals):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.elapsed = None
+        self.phases = []
+        self.sizes = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.start
+
+    def server_timing(self):
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.phases]
+        parts.append(f"total;dur={self.elapsed * 1000:.3f}")
+        return ", ".join(parts)
+
+    def to_dict(self):
+        phases = {}
+        for name, seconds in self.phases:
+            phases[name] = round(phases.get(name, 0) + seconds * 1000, 3)
+        return {"ms": round(self.elapsed * 1000, 3), "phases": phases, "sizes": self.sizes}
+
+
+class SlowestProfiler:
+    # Opt-in: profiles a random sample of requests with cProfile and keeps
+    # the .prof dumps of only the slowest N. Only one request is profiled
+    # at a time; others arriving meanwhile just go unprofiled.
+
+    def __init__(self, directory, keep, sample=1.0):
+        self.directory = directory
+        self.keep = keep
+        self.sample = sample
+        self.slowest = []
+        self.busy = threading.Lock()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        if random.random() >= self.sample or not self.busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile, timings):
+        profile.disable()
+        self.busy.release()
+        with self.lock:
+            if len(self.slowest) >= self.keep and timings.elapsed <= self.slowest[0][0]:
+                return
+            path = os.path.join(
+                self.directory,
+                f"{timings.endpoint}-{timings.elapsed * 1000:.0f}ms-{time.time_ns()}.prof",
+            )
+            profile.dump_stats(path)
+            heapq.heappush(self.slowest, (timings.elapsed, path))
+            if len(self.slowest) > self.keep:
+                _, evicted = heapq.heappop(self.slowest)
+                os.remove(evicted)
+
+
+def profiler_from_env():
+    keep = int(os.environ.get("SCHEDULER_PROFILE_SLOWEST", 0))
+    if keep <= 0:
+        return None
+    return SlowestProfiler(
+        os.environ.get("SCHEDULER_PROFILE_DIR", "profiles"),
+        keep,
+        float(os.environ.get("SCHEDULER_PROFILE_SAMPLE", 1.0)),
+    )
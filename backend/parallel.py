@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from coloring import connected_components, dsatur_heap, subgraph
+
+WORKERS = int(os.environ.get("SCHEDULER_WORKERS", os.cpu_count() or 1))
+MIN_TASK_SIZE = int(os.environ.get("SCHEDULER_MIN_TASK_SIZE", 2000))
+# forkserver avoids forking the threaded server (request, job and sqlite
+# threads) with locks held; Windows only has spawn.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Created on first use from a request thread.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(START_METHOD)
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context)
+        return _pool
+
+
+def pool_map(fn, *iterables):
+    # A worker dying mid-task (OOM killer, crash) breaks the whole pool. It
+    # is dropped so the next call starts a fresh one, and this call runs
+    # in-process instead.
+    global _pool
+    pool = get_pool()
+    try:
+        return list(pool.map(fn, *iterables))
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False)
+        return list(map(fn, *iterables))
+
+
+def color_task(graph, on_step=None):
+    start = time.perf_counter()
+    colors = dsatur_heap(graph, on_step)
+    return colors, time.perf_counter() - start
+
+
+def trace_task(graph):
+    # Like color_task, but also returns the order vertices were colored in,
+    # since a worker process can't call back into the parent.
+    order = array("l")
+    colors, seconds = color_task(graph, lambda v, c: order.append(v))
+    return colors, seconds, order
+
+
+def plan_tasks(components, min_task_size=MIN_TASK_SIZE):
+    # Large components get a task each; small ones are packed together until
+    # a batch reaches min_task_size vertices, so isolated courses don't each
+    # pay for a round trip to a worker process.
+    tasks = []
+    batch = []
+    batch_size = 0
+    for members in sorted(components, key=len, reverse=True):
+        if len(members) >= min_task_size:
+            tasks.append([members])
+            continue
+        batch.append(members)
+        batch_size += len(members)
+        if batch_size >= min_task_size:
+            tasks.append(batch)
+            batch = []
+            batch_size = 0
+    if batch:
+        tasks.append(batch)
+    return tasks
+
+
+def color_components(graph, workers=WORKERS, min_task_size=MIN_TASK_SIZE, on_step=None):
+    # on_step(vertex, color) is called for every coloring step: live on the
+    # serial path, and replayed task by task once the workers finish otherwise.
+    components = connected_components(graph)
+    tasks = plan_tasks(components, min_task_size)
+
+    if workers <= 1 or len(tasks) <= 1:
+        tasks = [components]
+        subgraphs = [graph]
+        results = [color_task(graph, on_step)]
+    else:
+        subgraphs = [subgraph(graph, sorted(v for members in task for v in members)) for task in tasks]
+        results = pool_map(color_task if on_step is None else trace_task, subgraphs)
+
+    colors = array("l", [0]) * len(graph)
+    report = []
+    for task, sub, (sub_colors, seconds, *trace) in zip(tasks, subgraphs, results):
+        if sub is graph:
+            colors = sub_colors
+        else:
+            for i, v in enumerate(sub.names):
+                colors[v] = sub_colors[i]
+            if trace:
+                for i in trace[0]:
+                    on_step(sub.names[i], sub_colors[i])
+        report.append({
+            "components": len(task),
+            "vertices": len(sub),
+            "edges": len(sub.neighbors) // 2,
+            "slots": max(sub_colors, default=0),
+            "ms": round(seconds * 1000, 3),
+        })
+    return colors, {"count": len(components), "tasks": report}
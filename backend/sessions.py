@@ -0,0 +1,250 @@
+import os
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+from coloring import CompactGraph, build_graph, check_exam_name, dsatur_heap, exam_key
+
+MAX_SESSIONS = int(os.environ.get("SCHEDULE_MAX_SESSIONS", 64))
+
+DELTA_FIELDS = {
+    "add_exam": ("exam",),
+    "remove_exam": ("exam",),
+    "add_conflict": ("exams",),
+    "remove_conflict": ("exams",),
+    "add_enrollment": ("student", "course"),
+    "remove_enrollment": ("student", "course"),
+}
+
+
+def pair(a, b):
+    return (a, b) if exam_key(a) < exam_key(b) else (b, a)
+
+
+def check_delta(delta):
+    # Everything apply() could trip over is checked up front, so a bad
+    # delta rejects the whole batch before the graph is touched.
+    if not isinstance(delta, dict):
+        raise ValueError(f"Deltas must be objects, not {delta!r}")
+    fields = DELTA_FIELDS.get(delta.get("op"))
+    if fields is None:
+        raise ValueError(f"Unknown delta op: {delta.get('op')}")
+    missing = [f for f in fields if f not in delta]
+    if missing:
+        raise ValueError(f"{delta['op']} needs {', '.join(missing)}")
+    if "exams" in delta:
+        if not isinstance(delta["exams"], list) or len(delta["exams"]) != 2:
+            raise ValueError(f"{delta['op']} needs exactly two exams")
+        for exam in delta["exams"]:
+            check_exam_name(exam)
+    for field in ("exam", "course"):
+        if field in fields:
+            check_exam_name(delta[field])
+    if "student" in fields:
+        check_exam_name(delta["student"], "Student ids")
+
+
+class Session:
+    # A server-held conflict graph (the build_graph dict of sets) and its
+    # coloring. Edge weights count the explicit conflicts and shared
+    # students behind each edge, so dropping one enrollment only removes
+    # the edge once nothing else supports it. students and courses index
+    # the enrollments both ways, so removing an exam only visits its own
+    # students.
+
+    def __init__(self, exams, conflicts, enrollments=()):
+        self.lock = threading.Lock()
+        self.graph = build_graph((check_exam_name(e) for e in exams), ())
+        self.weights = {}
+        self.students = {}
+        self.courses = {}
+        for a, b in conflicts:
+            self._add_weight(check_exam_name(a), check_exam_name(b))
+        for student, course in enrollments:
+            self._enroll(check_exam_name(student, "Student ids"), check_exam_name(course))
+        compact = CompactGraph.from_graph(self.graph)
+        self.color = compact.label(dsatur_heap(compact))
+        self.usage = Counter(self.color.values())
+        self.before = {}
+
+    def slots(self):
+        return max((c for c, count in self.usage.items() if count), default=0)
+
+    def _set_color(self, v, c):
+        self._clear_color(v)
+        self.color[v] = c
+        self.usage[c] += 1
+
+    def _clear_color(self, v):
+        # Remember each vertex's slot from before the current batch, so
+        # apply() can report the real diff once the batch is repaired.
+        if v not in self.before:
+            self.before[v] = self.color.get(v)
+        c = self.color.pop(v, None)
+        if c is not None:
+            self.usage[c] -= 1
+
+    def apply(self, deltas):
+        for delta in deltas:
+            check_delta(delta)
+
+        with self.lock:
+            self.before = {}
+            dirty = set()
+            for delta in deltas:
+                op = delta.get("op")
+                if op == "add_exam":
+                    self._add_exam(delta["exam"], dirty)
+                elif op == "remove_exam":
+                    self._remove_exam(delta["exam"])
+                elif op == "add_conflict":
+                    a, b = delta["exams"]
+                    self._add_exam(a, dirty)
+                    self._add_exam(b, dirty)
+                    self._add_weight(a, b, dirty)
+                elif op == "remove_conflict":
+                    a, b = delta["exams"]
+                    self._remove_weight(a, b)
+                elif op == "add_enrollment":
+                    self._add_exam(delta["course"], dirty)
+                    self._enroll(delta["student"], delta["course"], dirty)
+                else:
+                    self._unenroll(delta["student"], delta["course"])
+            dirty &= self.graph.keys()
+            self._repair(dirty)
+
+            changed = {}
+            removed = []
+            for v, old in self.before.items():
+                if v not in self.graph:
+                    if old is not None:
+                        removed.append(v)
+                elif self.color[v] != old:
+                    changed[v] = self.color[v]
+            self.before = {}
+            return changed, removed
+
+    def _add_exam(self, exam, dirty):
+        if exam not in self.graph:
+            self.graph[exam] = set()
+            dirty.add(exam)
+
+    def _remove_exam(self, exam):
+        neighbors = self.graph.pop(exam, None)
+        if neighbors is None:
+            return False
+        for n in neighbors:
+            self.graph[n].discard(exam)
+            self.weights.pop(pair(exam, n), None)
+        for student in self.courses.pop(exam, ()):
+            self.students[student].discard(exam)
+        self._clear_color(exam)
+        return True
+
+    def _add_weight(self, a, b, dirty=None):
+        if a == b:
+            return
+        key = pair(a, b)
+        self.weights[key] = self.weights.get(key, 0) + 1
+        if self.weights[key] > 1:
+            return
+        self.graph.setdefault(a, set()).add(b)
+        self.graph.setdefault(b, set()).add(a)
+        if dirty is not None and a in self.color and self.color.get(a) == self.color.get(b):
+            # Recolor the less constrained endpoint; it is the cheaper move.
+            dirty.add(min(key, key=lambda v: len(self.graph[v])))
+
+    def _remove_weight(self, a, b):
+        key = pair(a, b)
+        if key not in self.weights:
+            return
+        self.weights[key] -= 1
+        if not self.weights[key]:
+            del self.weights[key]
+            self.graph[a].discard(b)
+            self.graph[b].discard(a)
+
+    def _enroll(self, student, course, dirty=None):
+        courses = self.students.setdefault(student, set())
+        if course in courses:
+            return
+        self.graph.setdefault(course, set())
+        for other in courses:
+            self._add_weight(course, other, dirty)
+        courses.add(course)
+        self.courses.setdefault(course, set()).add(student)
+
+    def _unenroll(self, student, course):
+        courses = self.students.get(student)
+        if not courses or course not in courses:
+            return
+        courses.remove(course)
+        self.courses[course].discard(student)
+        for other in courses:
+            self._remove_weight(course, other)
+
+    def _free_colors(self, v, k):
+        used = {self.color[n] for n in self.graph[v] if n in self.color}
+        return [c for c in range(1, k + 1) if c not in used]
+
+    def _repair(self, dirty):
+        # DSATUR restricted to the dirty vertices; everything else keeps its
+        # slot. When no existing slot is free, try moving the single
+        # neighbour that blocks a slot before opening a new one.
+        for v in dirty:
+            self._clear_color(v)
+        k = self.slots()
+        while dirty:
+            v = max(dirty, key=lambda u: (
+                len({self.color[n] for n in self.graph[u] if n in self.color}), len(self.graph[u])))
+            dirty.remove(v)
+            free = self._free_colors(v, k)
+            if free:
+                c = free[0]
+            else:
+                kicked = self._kick(v, k)
+                if kicked is None:
+                    k += 1
+                    c = k
+                else:
+                    c = kicked
+            self._set_color(v, c)
+
+    def _kick(self, v, k):
+        for c in range(1, k + 1):
+            holders = [n for n in self.graph[v] if self.color.get(n) == c]
+            if len(holders) != 1:
+                continue
+            u = holders[0]
+            free = [f for f in self._free_colors(u, k) if f != c]
+            if free:
+                self._set_color(u, free[0])
+                return c
+        return None
+
+
+class SessionStore:
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def create(self, exams, conflicts, enrollments=()):
+        session = Session(exams, conflicts, enrollments)
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.sessions[session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return session_id, session
+
+    def get(self, session_id):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
@@ -0,0 +1,81 @@
+import gzip
+import io
+import json
+
+import pytest
+
+import app as server
+import metrics
+from app import app
+
+BODY = b"student,course\n" + b"".join(b"S%d,C%d\n" % (i, i % 7) for i in range(5000))
+
+
+def test_upload_streams_every_row():
+    client = app.test_client()
+    response = client.post("/upload", data={"file": (io.BytesIO(BODY), "a.csv")})
+    assert response.is_streamed
+    body = json.loads(response.get_data())
+    assert body["status"] == "success"
+    assert len(body["data"]) == 5000
+    assert body["data"][-1] == {"student": "S4999", "course": "C1"}
+
+
+def test_upload_accepts_chunked_bodies_without_content_length():
+    client = app.test_client()
+    response = client.post(
+        "/upload", input_stream=io.BytesIO(gzip.compress(BODY)), content_type="text/csv",
+        headers={"Transfer-Encoding": "chunked"}, environ_overrides={"wsgi.input_terminated": True},
+    )
+    assert len(json.loads(response.get_data())["data"]) == 5000
+
+
+def test_upload_reports_corruption_found_while_streaming():
+    client = app.test_client()
+    response = client.post("/upload", data=gzip.compress(BODY)[:-100], content_type="text/csv")
+    body = json.loads(response.get_data())
+    assert body["status"] == "error"
+    assert body["data"]
+
+
+def test_upload_rejects_corrupt_bodies_up_front():
+    client = app.test_client()
+    response = client.post("/upload", data=b"\x1f\x8bnot gzip at all", content_type="text/csv")
+    assert response.status_code == 400
+
+
+def test_graph_returns_weighted_course_edges():
+    client = app.test_client()
+    body = b"student,course\nS1,A\nS1,B\nS2,A\nS2,B\nS2,B\nS3,C\n"
+    response = client.post("/graph", data=body, content_type="text/csv").get_json()
+    assert response["courses"] == ["A", "B", "C"]
+    assert response["sizes"] == [2, 2, 1]
+    assert response["edges"] == {"source": [0], "target": [1], "weight": [2]}
+
+
+def test_graph_rejects_an_empty_body():
+    client = app.test_client()
+    assert client.post("/graph", data=b"", content_type="text/csv").status_code == 400
+
+
+def test_profiler_is_released_when_a_view_raises(tmp_path, monkeypatch):
+    profiler = metrics.SlowestProfiler(str(tmp_path), keep=2)
+    monkeypatch.setattr(server, "profiler", profiler)
+    # As under debug, where after_request is skipped for unhandled errors.
+    monkeypatch.setitem(app.config, "PROPAGATE_EXCEPTIONS", True)
+    client = app.test_client()
+    with pytest.raises(AttributeError):
+        client.post("/schedule", data="null", content_type="application/json")
+    assert not profiler.busy.locked()
+    assert len(profiler.slowest) == 1
+
+
+def test_streamed_uploads_are_profiled_and_recorded_once_written(tmp_path, monkeypatch):
+    profiler = metrics.SlowestProfiler(str(tmp_path), keep=2)
+    monkeypatch.setattr(server, "profiler", profiler)
+    client = app.test_client()
+    response = client.post("/upload", data=BODY, content_type="text/csv")
+    response.get_data()
+    response.close()
+    assert not profiler.busy.locked()
+    assert len(profiler.slowest) == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from cache import ScheduleCache, normalize, schedule_key, without_timings
+
+
+def test_key_ignores_exam_and_conflict_order():
+    a = normalize(["B", "A", "C"], [("A", "B"), ("C", "B"), ("B", "A")])
+    b = normalize(["C", "A", "B"], [("B", "C"), ("A", "B")])
+    assert schedule_key(*a) == schedule_key(*b)
+
+
+def test_normalize_sorts_mixed_name_types_and_rejects_others():
+    exams, conflicts = normalize(["B", 2, "A", 1], [(2, "A"), ("B", 1), ("A", 2)])
+    assert exams == [1, 2, "A", "B"]
+    assert conflicts == [(1, "B"), (2, "A")]
+    with pytest.raises(ValueError):
+        normalize([["A"]], [])
+    with pytest.raises(ValueError):
+        normalize(["A"], [("A",)])
+
+
+def test_cached_body_drops_per_run_timings():
+    response = {
+        "components": {"count": 1, "tasks": [{"vertices": 2, "ms": 1.5}]},
+        "improvement": {"slots": 2, "ms": 20.0},
+    }
+    cached = without_timings(response)
+    assert cached["components"]["tasks"] == [{"vertices": 2}]
+    assert cached["improvement"] == {"slots": 2}
+    assert response["improvement"]["ms"] == 20.0
+
+
+def test_lru_evicts_by_entries_and_bytes():
+    cache = ScheduleCache(max_entries=2, max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    cache.put("d", b"123456789")
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_disk_tier_survives_a_restart_and_invalidates_disk_only_keys(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ScheduleCache(path=path).put("k", b"body")
+
+    cache = ScheduleCache(path=path)
+    assert cache.get("k") == b"body"
+    assert cache.stats()["disk_hits"] == 1
+
+    cache = ScheduleCache(path=path)
+    assert cache.invalidate("k") == 1
+    assert cache.get("k") is None
+
+
+def test_disk_hits_refresh_recency_on_the_next_put(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = ScheduleCache(path=path, max_disk_entries=2)
+    writer.put("old", b"1")
+    writer.put("new", b"2")
+
+    reader = ScheduleCache(max_entries=0, path=path, max_disk_entries=2)
+    assert reader.get("old") == b"1"
+    reader.put("newest", b"3")
+    assert reader.get("old") == b"1"
+    assert reader.get("new") is None
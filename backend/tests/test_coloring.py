@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from coloring import CompactGraph, build_graph, dsatur, dsatur_heap
+
+
+def random_instance(rng):
+    n = rng.randint(0, 60)
+    exams = [f"E{i}" for i in range(n)]
+    # Duplicate exams, duplicate and reversed conflicts, self-loops and
+    # isolated exams all appear with some probability.
+    exams += rng.sample(exams, min(n, rng.randint(0, 3)))
+    conflicts = []
+    if n:
+        for _ in range(rng.randint(0, n * 3)):
+            a = rng.choice(exams)
+            b = a if rng.random() < 0.05 else rng.choice(exams)
+            conflicts.append((a, b))
+        conflicts += [(b, a) for a, b in rng.sample(conflicts, len(conflicts) // 4)]
+    return exams, conflicts
+
+
+def assert_proper(graph, coloring):
+    assert set(coloring) == set(graph)
+    for v, neighbors in graph.items():
+        for u in neighbors:
+            assert coloring[u] != coloring[v]
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_dsatur_heap_matches_reference(seed):
+    exams, conflicts = random_instance(random.Random(seed))
+    graph = build_graph(exams, conflicts)
+    expected = dsatur(graph)
+
+    compact = CompactGraph.from_edges(exams, conflicts)
+    assert compact.label(dsatur_heap(compact)) == expected
+
+    compact = CompactGraph.from_graph(graph)
+    assert compact.label(dsatur_heap(compact)) == expected
+    assert_proper(graph, expected)
+
+
+def test_isolated_exams_share_the_first_slot():
+    compact = CompactGraph.from_edges(["A", "B", "C"], [("A", "A")])
+    assert compact.label(dsatur_heap(compact)) == {"A": 1, "B": 1, "C": 1}
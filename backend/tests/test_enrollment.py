@@ -0,0 +1,73 @@
+import gzip
+import io
+import itertools
+import random
+
+import pytest
+
+from enrollment import Enrollments, InvalidUpload, co_enrollment, iter_lines, parse_jsonl, parse_rows
+
+CSV = "﻿student_id,course\nS1,Math\nS1,CS\nS2,Math\n".encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_lines_reads_concatenated_gzip_members(chunk_size):
+    body = gzip.compress(CSV) + gzip.compress(b"S3,Bio\nS3,CS\n")
+    rows = list(parse_rows(iter_lines(io.BytesIO(body), chunk_size)))
+    assert rows == [("S1", "Math"), ("S1", "CS"), ("S2", "Math"), ("S3", "Bio"), ("S3", "CS")]
+
+
+def test_iter_lines_drops_the_bom():
+    assert next(iter_lines(io.BytesIO(CSV))) == "student_id,course"
+
+
+@pytest.mark.parametrize("body", [gzip.compress(CSV)[:-10], b"\x1f\x8b\x08\x00garbage", b"\xff\xfe,x\n"])
+def test_iter_lines_rejects_corrupt_bodies(body):
+    with pytest.raises(InvalidUpload):
+        list(iter_lines(io.BytesIO(body)))
+
+
+def test_parse_jsonl_skips_malformed_and_non_object_lines():
+    lines = ['{"student": "S1", "course": "A"}', "not json", "[1, 2]", '"x"', "", '{"student_id": 7, "course_id": "B"}']
+    assert list(parse_jsonl(lines)) == [("S1", "A"), ("7", "B")]
+
+
+def reference_co_enrollment(rows):
+    courses = {}
+    for student, course in rows:
+        courses.setdefault(student, set()).add(course)
+    sizes = {}
+    counts = {}
+    for taken in courses.values():
+        for course in taken:
+            sizes[course] = sizes.get(course, 0) + 1
+        for a, b in itertools.combinations(sorted(taken), 2):
+            counts[a, b] = counts.get((a, b), 0) + 1
+    return sizes, counts
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_co_enrollment_matches_pairwise_counts(seed):
+    rng = random.Random(seed)
+    rows = [(f"S{rng.randrange(200)}", f"C{rng.randrange(40)}") for _ in range(1000)]
+    rows += rows[:100]
+    enrollments = Enrollments.from_rows(rows)
+    sizes, source, target, weight = co_enrollment(enrollments)
+
+    names = enrollments.courses.names
+    edges = {}
+    for u, v, w in zip(source, target, weight):
+        assert u < v
+        edges[tuple(sorted((names[u], names[v])))] = w
+    expected_sizes, expected_counts = reference_co_enrollment(rows)
+    assert dict(zip(names, sizes)) == expected_sizes
+    assert edges == expected_counts
+
+
+def test_co_enrollment_counts_duplicate_rows_once():
+    enrollments = Enrollments.from_rows([("S1", "A"), ("S1", "B"), ("S1", "A"), ("S1", "B")])
+    assert co_enrollment(enrollments) == ([1, 1], [0], [1], [1])
+
+
+def test_co_enrollment_of_nothing():
+    assert co_enrollment(Enrollments()) == ([], [], [], [])
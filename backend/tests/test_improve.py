@@ -0,0 +1,32 @@
+import random
+import time
+
+from coloring import CompactGraph, dsatur_heap
+from improve import improve
+
+
+def random_graph(n, p, seed):
+    rng = random.Random(seed)
+    conflicts = [(a, b) for a in range(n) for b in range(a + 1, n) if rng.random() < p]
+    return CompactGraph.from_edges(range(n), conflicts)
+
+
+def test_improve_returns_a_proper_coloring_no_worse_than_dsatur():
+    graph = random_graph(120, 0.5, seed=0)
+    colors = list(dsatur_heap(graph))
+    best, info = improve(graph, colors, time_budget_ms=300)
+    for v in range(len(graph)):
+        for u in graph.adjacent(v):
+            assert best[u] != best[v]
+    assert info["slots"] == max(best) <= max(colors)
+    assert info["saved"] == max(colors) - max(best)
+
+
+def test_improve_stays_within_its_budget_on_a_large_graph():
+    rng = random.Random(1)
+    n = 20000
+    graph = CompactGraph.from_edges(range(n), [(rng.randrange(n), rng.randrange(n)) for _ in range(400000)])
+    colors = list(dsatur_heap(graph))
+    start = time.perf_counter()
+    improve(graph, colors, time_budget_ms=300)
+    assert time.perf_counter() - start < 0.45
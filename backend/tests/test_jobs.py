@@ -0,0 +1,36 @@
+import time
+
+from app import app
+
+
+def wait_for(client, job_id):
+    for _ in range(500):
+        summary = client.get(f"/jobs/{job_id}").get_json()
+        if summary["state"] in ("done", "error"):
+            return summary
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_matches_schedule_and_streams_every_step():
+    client = app.test_client()
+    client.post("/cache/invalidate", json={})
+    exams = ["E", "A", "D", "B", "C", "F"]
+    conflicts = [["A", "B"], ["B", "C"], ["C", "A"], ["D", "E"]]
+
+    job_id = client.post("/jobs", json={"exams": exams, "conflicts": conflicts}).get_json()["job"]
+    summary = wait_for(client, job_id)
+    assert summary["state"] == "done" and not summary["cached"]
+
+    response = client.post("/schedule", json={"exams": exams, "conflicts": conflicts})
+    assert response.headers["X-Cache"] == "HIT"
+    assert summary["scheduled"] == response.get_json()["scheduled"]
+
+    events = client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+    assert events.count("event: step") == len(exams)
+    assert '"scheduled"' in events.split("event: done")[1]
+
+
+def test_job_rejects_invalid_exam_names():
+    client = app.test_client()
+    assert client.post("/jobs", json={"exams": [["A"]]}).status_code == 400
@@ -0,0 +1,16 @@
+import os
+
+import parallel
+
+
+def exit_in_worker(pid):
+    if os.getpid() != pid:
+        os._exit(1)
+    return pid
+
+
+def test_broken_pool_is_replaced_and_the_call_runs_in_process():
+    pool = parallel.get_pool()
+    assert parallel.pool_map(exit_in_worker, [os.getpid()] * 2) == [os.getpid()] * 2
+    assert parallel.get_pool() is not pool
+    assert parallel.pool_map(abs, [-1, -2]) == [1, 2]
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from sessions import Session
+
+OPS = ("add_exam", "remove_exam", "add_conflict", "remove_conflict", "add_enrollment", "remove_enrollment")
+
+
+def random_delta(rng, exams, students):
+    op = rng.choice(OPS)
+    if op in ("add_exam", "remove_exam"):
+        return {"op": op, "exam": rng.choice(exams)}
+    if op in ("add_conflict", "remove_conflict"):
+        return {"op": op, "exams": [rng.choice(exams), rng.choice(exams)]}
+    return {"op": op, "student": rng.choice(students), "course": rng.choice(exams)}
+
+
+def assert_valid(session):
+    assert set(session.color) == set(session.graph)
+    enrolled = {(s, c) for s, courses in session.students.items() for c in courses}
+    assert enrolled == {(s, c) for c, students in session.courses.items() for s in students}
+    for v, neighbors in session.graph.items():
+        for u in neighbors:
+            assert session.color[u] != session.color[v]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_deltas_keep_a_valid_coloring_and_report_the_diff(seed):
+    rng = random.Random(seed)
+    exams = [f"E{i}" for i in range(40)]
+    students = [f"S{i}" for i in range(30)]
+    conflicts = [(rng.choice(exams[:30]), rng.choice(exams[:30])) for _ in range(60)]
+    session = Session(exams[:30], conflicts)
+    assert_valid(session)
+
+    for _ in range(200):
+        before = dict(session.color)
+        deltas = [random_delta(rng, exams, students) for _ in range(rng.randint(1, 5))]
+        changed, removed = session.apply(deltas)
+
+        assert_valid(session)
+        assert changed == {v: c for v, c in session.color.items() if before.get(v) != c}
+        assert set(removed) == set(before) - set(session.color)
+
+
+def test_removing_and_readding_an_exam_keeps_it_scheduled():
+    session = Session(["A", "B", "C"], [("A", "B")])
+    changed, removed = session.apply([
+        {"op": "remove_exam", "exam": "C"},
+        {"op": "add_exam", "exam": "C"},
+    ])
+    assert "C" in session.color
+    assert removed == []
+    assert_valid(session)
+
+
+def test_unknown_op_is_rejected_before_anything_changes():
+    session = Session(["A", "B"], [("A", "B")])
+    with pytest.raises(ValueError):
+        session.apply([{"op": "add_exam", "exam": "C"}, {"op": "bogus"}])
+    assert "C" not in session.graph
+
+
+@pytest.mark.parametrize("bad", [
+    {"op": "add_conflict", "exams": ["C", ["D"]]},
+    {"op": "add_conflict", "exams": "CD"},
+    {"op": "add_exam", "exam": {"name": "D"}},
+    {"op": "add_enrollment", "student": ["S"], "course": "C"},
+    "add_exam",
+])
+def test_invalid_names_are_rejected_before_anything_changes(bad):
+    session = Session(["A", "B"], [("A", "B")])
+    with pytest.raises(ValueError):
+        session.apply([{"op": "add_exam", "exam": "C"}, bad])
+    assert set(session.graph) == {"A", "B"}
+    assert_valid(session)
+
+
+def test_mixed_numeric_and_string_names():
+    session = Session(["A", 1], [("A", 1)])
+    session.apply([{"op": "add_conflict", "exams": ["C", 5]}, {"op": "add_conflict", "exams": [5, "A"]}])
+    assert set(session.graph) == {"A", 1, "C", 5}
+    assert_valid(session)
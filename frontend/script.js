@@ -3,6 +3,8 @@ let conflicts = [];
 let holidays = [];
 let cy = null;
 
+const API_URL = "http://127.0.0.1:5000";
+
 const COLOR_PALETTE = [
   "#4F46E5","#10B981","#EF476F","#F59E0B","#06B6D4","#8B5CF6",
   "#F97316","#0891B2","#A3E635","#EC4899","#0EA5A4","#84CC16",
@@ -63,41 +65,27 @@ function uploadCSV(){
 
   resetAllData(); // RESET after file check
 
-  const reader = new FileReader();
-  reader.onload = () => {
-    const lines = reader.result.trim().split("\n");
-    const enrollments = [];
-
-    lines.forEach((line, idx) => {
-      if(idx === 0 && line.toLowerCase().includes("student")) return;
-      const parts = line.split(",");
-      if(parts.length < 2) return;
-      enrollments.push({ student: parts[0].trim(), course: parts[1].trim() });
-    });
-
-    // ADD ALL COURSES (even if no conflicts)
-    enrollments.forEach(e => addExam(e.course));
-
-    const studentMap = {};
-    enrollments.forEach(e => {
-      if(!studentMap[e.student]) studentMap[e.student] = [];
-      studentMap[e.student].push(e.course);
-    });
-
-    Object.values(studentMap).forEach(courses => {
-      for(let i=0; i<courses.length; i++){
-        for(let j=i+1; j<courses.length; j++){
-          addConflict(courses[i], courses[j]);
-        }
-      }
-    });
-
-    $("uploadStatus").textContent = "CSV uploaded successfully!";
-    renderConflicts();
-    drawGraph();
-  };
-
-  reader.readAsText(file);
+  const form = new FormData();
+  form.append("file", file);
+
+  fetch(`${API_URL}/graph`, { method: "POST", body: form })
+    .then(res => res.json())
+    .then(res => {
+      if(res.status !== "success") return alert(res.message || "Upload failed");
+
+      // ADD ALL COURSES (even if no conflicts)
+      exams = res.courses.slice();
+      const { source, target } = res.edges;
+      conflicts = source.map((u, i) => {
+        const a = res.courses[u], b = res.courses[target[i]];
+        return a < b ? [a,b] : [b,a];
+      });
+
+      $("uploadStatus").textContent = "CSV uploaded successfully!";
+      renderConflicts();
+      drawGraph();
+    })
+    .catch(() => alert("Could not reach the scheduling server"));
 }
 
 /* ---------- Exam & Conflict ---------- */
@@ -153,69 +141,89 @@ function removeHoliday(i){
   renderHolidays();
 }
 
-/* ---------- DSATUR ---------- */
-function buildGraph(){
-  const graph = {};
-  exams.forEach(e => graph[e] = new Set());
-  conflicts.forEach(([a,b]) => {
-    graph[a].add(b);
-    graph[b].add(a);
-  });
-  return graph;
+/* ---------- Scheduling jobs ---------- */
+function startJob(){
+  return fetch(`${API_URL}/jobs`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ exams, conflicts })
+  })
+    .then(res => res.json())
+    .then(res => res.job);
 }
 
-function dsaturSteps(graph){
-  const vertices = Object.keys(graph);
-  const degree = {};
-  const color = {};
-  const sat = {};
-  const uncolored = new Set(vertices);
-
-  vertices.forEach(v => {
-    degree[v] = graph[v].size;
-    color[v] = 0;
-    sat[v] = new Set();
-  });
-
-  const steps = [];
-
-  while(uncolored.size){
-    const chosen = [...uncolored].sort((a,b)=>{
-      if(sat[b].size != sat[a].size) return sat[b].size - sat[a].size;
-      return degree[b] - degree[a];
-    })[0];
-
-    const used = new Set();
-    graph[chosen].forEach(n => {
-      if(color[n]>0) used.add(color[n]);
+// Server-sent DSATUR steps: { chosen, color } per colored exam, where
+// chosen indexes the exam names sent once in the "graph" event. Each step's
+// event id is its 1-based position, so after a dropped connection the
+// browser resumes with Last-Event-ID and already-applied steps are skipped.
+// Resolves with the "done" event: { slots, scheduled, ms }, where scheduled
+// is the same exam -> slot map /schedule returns.
+function streamJob(jobId, onStep){
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_URL}/jobs/${jobId}/events`);
+    let names = [];
+    let total = 0;
+    let applied = 0;
+
+    setProgress(0);
+    source.addEventListener("graph", e => {
+      const data = JSON.parse(e.data);
+      names = data.exams;
+      total = data.total;
     });
-
-    let c=1;
-    while(used.has(c)) c++;
-    color[chosen] = c;
-
-    steps.push({ chosen, colorAssigned:c, colorMap:{...color} });
-    uncolored.delete(chosen);
-
-    graph[chosen].forEach(n => {
-      if(uncolored.has(n)) sat[n].add(c);
+    source.addEventListener("step", e => {
+      const id = Number(e.lastEventId);
+      if(id <= applied) return;
+      applied = id;
+      const step = JSON.parse(e.data);
+      setProgress(total ? applied / total : 1);
+      onStep(names[step.chosen], step.color);
     });
-  }
+    source.addEventListener("done", e => {
+      source.close();
+      setProgress(1);
+      resolve(JSON.parse(e.data));
+    });
+    source.addEventListener("failed", e => {
+      source.close();
+      reject(JSON.parse(e.data).message);
+    });
+    // Transient drops are retried by EventSource itself; only give up once
+    // the browser has stopped reconnecting.
+    source.addEventListener("error", () => {
+      if(source.readyState === EventSource.CLOSED){
+        reject("Lost connection to the scheduling server");
+      }
+    });
+  });
+}
 
-  return steps;
+function setProgress(value){
+  document.querySelectorAll(".job-progress").forEach(bar => bar.value = value);
 }
 
 /* ---------- Animation ---------- */
 async function animateDSATUR(){
   if(!cy) drawGraph();
-  const steps = dsaturSteps(buildGraph());
+  const steps = [];
+
+  let result;
+  try {
+    const jobId = await startJob();
+    result = await streamJob(jobId, (chosen, color) => steps.push({ chosen, color }));
+  } catch(err) {
+    return alert(err);
+  }
 
   for(let i=0; i<steps.length; i++){
     const s = steps[i];
     highlightNode(s.chosen);
     await sleep(600);
-    assignColor(s.chosen, s.colorAssigned);
+    assignColor(s.chosen, s.color);
   }
+  // The steps are the DSATUR trace; settle on the final schedule, which
+  // may use fewer slots once improved.
+  Object.keys(result.scheduled).forEach(e => assignColor(e, result.scheduled[e]));
 }
 
 function clearColors() {
@@ -295,12 +303,19 @@ function assignColor(id, num){
 }
 
 /* ---------- Proceed & Schedule ---------- */
-function proceed(){
+async function proceed(){
   if(exams.length==0) return alert("Upload CSV first");
   drawGraph();
-  const steps = dsaturSteps(buildGraph());
-  const final = steps[steps.length-1].colorMap;
-  displayResult(final);
+  let result;
+
+  try {
+    const jobId = await startJob();
+    result = await streamJob(jobId, () => {});
+  } catch(err) {
+    return alert(err);
+  }
+
+  displayResult(result.scheduled);
 }
 
 function displayResult(colorMap){